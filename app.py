@@ -1,17 +1,26 @@
-from flask import Flask, render_template, request, flash, redirect, url_for, session
+from flask import Flask, render_template, request, flash, redirect, url_for, session, make_response, g, abort
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, SelectField, TextAreaField, FloatField, PasswordField
 from wtforms.validators import DataRequired, NumberRange, Email, Length, EqualTo
 from werkzeug.security import generate_password_hash, check_password_hash
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import select, insert, update, func, case, true, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload, lazyload, raiseload, load_only, deferred
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timezone
+from collections import OrderedDict
+import threading
+import time
+import hashlib
+import hmac
 import os
-import re
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging: INFO solo con DEBUG=1, en producción basta WARNING
+logging.basicConfig(level=logging.INFO if os.environ.get('DEBUG') == '1' else logging.WARNING)
 
 app = Flask(__name__)
 
@@ -27,10 +36,53 @@ if database_url and database_url.startswith("postgres://"):
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'policard2025secret')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if not database_url.startswith('sqlite'):
+    # Conexiones persistentes: cada request reutiliza una conexión ya abierta y verificada
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 5,
+        # Por debajo del corte de conexiones inactivas de Render/Heroku (~5 min)
+        'pool_recycle': 280,
+        'pool_pre_ping': True
+    }
+# En desarrollo/pruebas se puede bajar el costo, p. ej. 'pbkdf2:sha1:1000'
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+app.config['PASSWORD_CACHE_SIZE'] = int(os.environ.get('PASSWORD_CACHE_SIZE', 1024))
+app.config['PASSWORD_CACHE_TTL'] = int(os.environ.get('PASSWORD_CACHE_TTL', 300))
+# Con REDIS_URL los workers comparten la caché y las invalidaciones; si no, una por proceso
+if os.environ.get('REDIS_URL'):
+    app.config['CACHE_TYPE'] = 'RedisCache'
+    app.config['CACHE_REDIS_URL'] = os.environ['REDIS_URL']
+    app.config['CACHE_KEY_PREFIX'] = 'policard:'
+else:
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+app.config['CACHE_DEFAULT_TIMEOUT'] = 60
 
 print(f"🎯 URL FINAL: {app.config['SQLALCHEMY_DATABASE_URI']}")
 
+# Plantillas: sin revisar mtimes en producción y con bytecode compilado compartido en disco
+if not app.debug:
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+    os.environ.get('JINJA_CACHE_DIR') or None, '__policard_jinja_%s.cache'
+)
+
 db = SQLAlchemy(app)
+cache = Cache(app)
+
+def _pragmas_sqlite(dbapi_conn, connection_record):
+    # WAL: lectores concurrentes con un escritor y commits sin fsync por escritura
+    cursor = dbapi_conn.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+if database_url.startswith('sqlite'):
+    with app.app_context():
+        event.listen(db.engine, 'connect', _pragmas_sqlite)
 
 # ==================== MODELOS ====================
 class Usuario(db.Model):
@@ -40,22 +92,26 @@ class Usuario(db.Model):
     nombre = db.Column(db.String(100), nullable=False)
     tipo = db.Column(db.String(20), nullable=False)
     activo = db.Column(db.Boolean, default=True)
-    fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_registro = db.Column(db.DateTime(timezone=True), default=func.now(), server_default=func.now())
     
-    banco = db.relationship('Banco', backref='usuario', uselist=False, cascade='all, delete-orphan')
+    banco = db.relationship('Banco', back_populates='usuario', uselist=False, cascade='all, delete-orphan')
 
 class Banco(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False, index=True)
     nombre_banco = db.Column(db.String(100), nullable=False)
     telefono = db.Column(db.String(20))
     sitio_web = db.Column(db.String(200))
     descripcion = db.Column(db.Text)
-    logo_url = db.Column(db.String(300))
+    # Ninguna vista lo muestra: se carga solo si se accede explícitamente
+    logo_url = deferred(db.Column(db.String(300)))
     aprobado = db.Column(db.Boolean, default=False)
-    fecha_aprobacion = db.Column(db.DateTime)
+    fecha_aprobacion = db.Column(db.DateTime(timezone=True))
     
-    tarjetas = db.relationship('Tarjeta', backref='banco_rel', cascade='all, delete-orphan')
+    # Estrategia explícita en cada lado: las vistas de banco siempre recorren sus tarjetas
+    usuario = db.relationship('Usuario', back_populates='banco')
+    tarjetas = db.relationship('Tarjeta', back_populates='banco_rel', cascade='all, delete-orphan', lazy='selectin')
+    solicitudes = db.relationship('Solicitud', back_populates='banco')
 
 class Tarjeta(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -68,8 +124,18 @@ class Tarjeta(db.Model):
     beneficios = db.Column(db.Text)
     imagen_url = db.Column(db.String(300))
     aprobada = db.Column(db.Boolean, default=False)
-    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
-    fecha_aprobacion = db.Column(db.DateTime)
+    fecha_creacion = db.Column(db.DateTime(timezone=True), default=func.now(), server_default=func.now())
+    fecha_aprobacion = db.Column(db.DateTime(timezone=True))
+    
+    # En debug cualquier acceso sin joinedload explícito falla en lugar de emitir un SELECT por fila
+    banco_rel = db.relationship('Banco', back_populates='tarjetas', lazy='raise' if app.debug else 'select')
+    
+    # Igualdades (aprobada, tipo) antes del rango (edad_minima); consulta_catalogo lo usa por aprobada.
+    # ix_tarjeta_banco_aprobada también sirve como índice de la FK banco_id (prefijo)
+    __table_args__ = (
+        db.Index('ix_tarjeta_search', 'aprobada', 'tipo', 'edad_minima'),
+        db.Index('ix_tarjeta_banco_aprobada', 'banco_id', 'aprobada'),
+    )
     
     @property
     def banco_nombre(self):
@@ -82,48 +148,125 @@ class Solicitud(db.Model):
     referencia_id = db.Column(db.Integer)
     estado = db.Column(db.String(20), default='pendiente')
     comentario_admin = db.Column(db.Text)
-    fecha_solicitud = db.Column(db.DateTime, default=datetime.utcnow)
-    fecha_respuesta = db.Column(db.DateTime)
+    fecha_solicitud = db.Column(db.DateTime(timezone=True), default=func.now(), server_default=func.now())
+    fecha_respuesta = db.Column(db.DateTime(timezone=True))
+    
+    __table_args__ = (
+        db.Index('ix_solicitud_pending', 'estado', 'fecha_solicitud'),
+    )
     
-    banco = db.relationship('Banco', backref='solicitudes')
+    banco = db.relationship('Banco', back_populates='solicitudes')
+    # Solo para solicitudes de tarjeta: permite crear tarjeta y solicitud sin flush() intermedio
+    tarjeta = db.relationship(
+        'Tarjeta',
+        primaryjoin="and_(Solicitud.referencia_id == Tarjeta.id, Solicitud.tipo_solicitud == 'tarjeta')",
+        foreign_keys=[referencia_id]
+    )
+
+@event.listens_for(Solicitud, 'before_insert')
+def _referencia_banco(mapper, connection, solicitud):
+    # En solicitudes de banco la referencia es el propio banco_id, ya resuelto por la unidad de trabajo
+    if solicitud.tipo_solicitud == 'banco' and solicitud.referencia_id is None:
+        solicitud.referencia_id = solicitud.banco_id
 
 # ==================== FORMULARIOS ====================
+# Validadores sin estado, compartidos entre formularios
+_REQUERIDO = [DataRequired()]
+_EMAIL_VALIDATORS = [DataRequired(), Email()]
+_MONTO_VALIDATORS = [DataRequired(), NumberRange(min=0)]
+_EDAD_VALIDATORS = [DataRequired(), NumberRange(min=18, max=100)]
+
+TIPOS_TARJETA = [
+    ('', 'Selecciona un tipo'),
+    ('estudiante', 'Estudiante'), 
+    ('joven', 'Joven'), 
+    ('clasica', 'Clásica')
+]
+
 class LoginForm(FlaskForm):
-    email = StringField('Email', validators=[DataRequired(), Email()])
-    password = PasswordField('Contraseña', validators=[DataRequired()])
+    email = StringField('Email', validators=_EMAIL_VALIDATORS)
+    password = PasswordField('Contraseña', validators=_REQUERIDO)
 
 class RegistroBancoForm(FlaskForm):
-    email = StringField('Email', validators=[DataRequired(), Email()])
+    email = StringField('Email', validators=_EMAIL_VALIDATORS)
     password = PasswordField('Contraseña', validators=[DataRequired(), Length(min=6)])
     confirm_password = PasswordField('Confirmar Contraseña', validators=[DataRequired(), EqualTo('password')])
-    nombre_contacto = StringField('Nombre de Contacto', validators=[DataRequired()])
-    nombre_banco = StringField('Nombre del Banco', validators=[DataRequired()])
-    telefono = StringField('Teléfono', validators=[DataRequired()])
+    nombre_contacto = StringField('Nombre de Contacto', validators=_REQUERIDO)
+    nombre_banco = StringField('Nombre del Banco', validators=_REQUERIDO)
+    telefono = StringField('Teléfono', validators=_REQUERIDO)
     sitio_web = StringField('Sitio Web')
     descripcion = TextAreaField('Descripción del Banco')
 
 class TarjetaForm(FlaskForm):
-    nombre = StringField('Nombre de la Tarjeta', validators=[DataRequired()])
-    tipo = SelectField('Tipo', choices=[
-        ('', 'Selecciona un tipo'),
-        ('estudiante', 'Estudiante'), 
-        ('joven', 'Joven'), 
-        ('clasica', 'Clásica')
-    ], validators=[DataRequired()])
-    cat = FloatField('CAT (%)', validators=[DataRequired(), NumberRange(min=0)])
-    anualidad = FloatField('Anualidad ($)', validators=[DataRequired(), NumberRange(min=0)])
-    edad_minima = IntegerField('Edad Mínima', validators=[DataRequired(), NumberRange(min=18, max=100)])
+    nombre = StringField('Nombre de la Tarjeta', validators=_REQUERIDO)
+    tipo = SelectField('Tipo', choices=TIPOS_TARJETA, validators=_REQUERIDO)
+    cat = FloatField('CAT (%)', validators=_MONTO_VALIDATORS)
+    anualidad = FloatField('Anualidad ($)', validators=_MONTO_VALIDATORS)
+    edad_minima = IntegerField('Edad Mínima', validators=_EDAD_VALIDATORS)
     beneficios = TextAreaField('Beneficios')
     imagen_url = StringField('URL de la Imagen')
 
 class BusquedaForm(FlaskForm):
-    edad = IntegerField('Edad', validators=[DataRequired(), NumberRange(min=18, max=100)])
-    tipo = SelectField('Tipo', choices=[
-        ('', 'Selecciona un tipo'),
-        ('estudiante', 'Estudiante'), 
-        ('joven', 'Joven'), 
-        ('clasica', 'Clásica')
-    ], validators=[DataRequired()])
+    edad = IntegerField('Edad', validators=_EDAD_VALIDATORS)
+    tipo = SelectField('Tipo', choices=TIPOS_TARJETA, validators=_REQUERIDO)
+
+# ==================== CONTRASEÑAS ====================
+_verificaciones_ok = OrderedDict()
+_verificaciones_lock = threading.Lock()
+
+def hash_password(password):
+    return generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
+
+def _huella_password(password):
+    # HMAC-SHA256 con la SECRET_KEY como pepper: órdenes de magnitud más barato que el KDF
+    return hmac.new(app.config['SECRET_KEY'].encode(), password.encode(), hashlib.sha256).digest()
+
+def verificar_password(usuario, password):
+    # Cache LRU por usuario de la última verificación exitosa, válida PASSWORD_CACHE_TTL segundos
+    huella = _huella_password(password)
+    with _verificaciones_lock:
+        entrada = _verificaciones_ok.get(usuario.id)
+    if entrada is not None:
+        password_hash, huella_ok, expira = entrada
+        if (password_hash == usuario.password and time.time() < expira
+                and hmac.compare_digest(huella, huella_ok)):
+            with _verificaciones_lock:
+                if usuario.id in _verificaciones_ok:
+                    _verificaciones_ok.move_to_end(usuario.id)
+            return True
+    if not check_password_hash(usuario.password, password):
+        return False
+    with _verificaciones_lock:
+        _verificaciones_ok[usuario.id] = (usuario.password, huella, time.time() + app.config['PASSWORD_CACHE_TTL'])
+        _verificaciones_ok.move_to_end(usuario.id)
+        if len(_verificaciones_ok) > app.config['PASSWORD_CACHE_SIZE']:
+            _verificaciones_ok.popitem(last=False)
+    return True
+
+def olvidar_verificaciones(user_id):
+    with _verificaciones_lock:
+        _verificaciones_ok.pop(user_id, None)
+
+# ==================== CONSULTAS ====================
+def existe(consulta):
+    # SELECT EXISTS(...): la base responde un booleano sin materializar filas ORM
+    return db.session.scalar(select(consulta.exists()))
+
+# ==================== USUARIO ACTUAL ====================
+def current_user():
+    # Un solo SELECT por request (con su banco); decoradores y vistas comparten el objeto
+    if 'user' not in g:
+        user_id = session.get('user_id')
+        g.user = cargar_usuario_con_banco(user_id) if user_id is not None else None
+    return g.user
+
+def cargar_usuario_con_banco(user_id):
+    # Session.get revisa primero el identity map; si hay que ir a la base, usuario y banco
+    # llegan en un JOIN y las tarjetas solo se consultan si la vista las usa
+    return db.session.get(
+        Usuario, user_id,
+        options=[joinedload(Usuario.banco).lazyload(Banco.tarjetas)]
+    )
 
 # ==================== DECORADORES ====================
 def login_required(f):
@@ -141,8 +284,8 @@ def admin_required(f):
         if 'user_id' not in session:
             flash('Debes iniciar sesión', 'warning')
             return redirect(url_for('login'))
-        usuario = Usuario.query.get(session['user_id'])
-        if not usuario or usuario.tipo != 'admin':
+        # tipo y activo se copian a la sesión en el login: no hace falta consultar Usuario
+        if session.get('user_type') != 'admin' or not session.get('user_active', True):
             flash('No tienes permisos de administrador', 'danger')
             return redirect(url_for('index'))
         return f(*args, **kwargs)
@@ -154,26 +297,91 @@ def banco_required(f):
         if 'user_id' not in session:
             flash('Debes iniciar sesión', 'warning')
             return redirect(url_for('login'))
-        usuario = Usuario.query.get(session['user_id'])
-        if not usuario or usuario.tipo != 'banco':
+        if session.get('user_type') != 'banco' or not session.get('user_active', True):
             flash('No tienes permisos de banco', 'danger')
             return redirect(url_for('index'))
-        if not usuario.banco:
+        usuario = current_user()
+        if not usuario or not usuario.banco:
             flash('No se encontró información del banco', 'danger')
             return redirect(url_for('logout'))
         return f(*args, **kwargs)
     return decorated_function
 
+def es_visitante_anonimo():
+    # base.html muestra el usuario y los mensajes flash; solo esas páginas son cacheables
+    return 'user_id' not in session and '_flashes' not in session
+
+def pagina_con_etag(html, etag=None, publico=True):
+    response = make_response(html)
+    response.set_etag(etag or hashlib.md5(html.encode()).hexdigest(), weak=True)
+    if publico:
+        # Navegadores y CDN pueden reutilizarla un minuto; después revalidan con el ETag
+        response.cache_control.public = True
+        response.cache_control.max_age = 60
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+_PAGINAS_ESTATICAS = {}
+
+def render_estatico(template):
+    # Sin datos dinámicos: para visitantes anónimos se renderiza una sola vez por proceso
+    if not es_visitante_anonimo():
+        return render_template(template)
+    pagina = _PAGINAS_ESTATICAS.get(template)
+    if pagina is None:
+        html = render_template(template)
+        pagina = _PAGINAS_ESTATICAS[template] = (html, hashlib.md5(html.encode()).hexdigest())
+    return pagina_con_etag(*pagina)
+
+def invalidar_estadisticas_admin():
+    cache.delete('admin:stats')
+
+def invalidar_catalogo():
+    # Todo cambio del catálogo también mueve los totales del panel admin
+    cache.delete('public_tarjetas')
+    cache.delete('catalogo:filas')
+    invalidar_estadisticas_admin()
+
+def consulta_catalogo():
+    # Filas ligeras (sin identity map) con solo las columnas que usan las plantillas
+    return (
+        select(
+            Tarjeta.id, Tarjeta.nombre, Tarjeta.tipo, Tarjeta.cat, Tarjeta.anualidad,
+            Tarjeta.edad_minima, Tarjeta.beneficios, Tarjeta.imagen_url,
+            Banco.nombre_banco.label('banco')
+        )
+        .join(Banco, Tarjeta.banco_id == Banco.id)
+        .where(Tarjeta.aprobada == True)
+    )
+
+def catalogo_aprobado():
+    # El catálogo aprobado es pequeño y casi estático: /buscar filtra en memoria
+    filas = cache.get('catalogo:filas')
+    if filas is None:
+        filas = db.session.execute(consulta_catalogo()).all()
+        cache.set('catalogo:filas', filas, timeout=120)
+    return filas
+
 # ==================== RUTAS PÚBLICAS ====================
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_estatico('index.html')
 
 @app.route('/tarjetas')
 def tarjetas():
     try:
-        todas_tarjetas = Tarjeta.query.filter_by(aprobada=True).all()
-        return render_template('tarjetas.html', tarjetas=todas_tarjetas)
+        anonimo = es_visitante_anonimo()
+        pagina = cache.get('public_tarjetas') if anonimo else None
+        if pagina is None:
+            todas_tarjetas = catalogo_aprobado()
+            html = render_template('tarjetas.html', tarjetas=todas_tarjetas)
+            pagina = (html, hashlib.md5(html.encode()).hexdigest())
+            if anonimo:
+                cache.set('public_tarjetas', pagina, timeout=120)
+        
+        return pagina_con_etag(*pagina, publico=anonimo)
     except Exception as e:
         flash('Error al cargar las tarjetas', 'danger')
         return render_template('tarjetas.html', tarjetas=[])
@@ -187,11 +395,10 @@ def buscar():
         try:
             edad = form.edad.data
             tipo = form.tipo.data
-            resultados = Tarjeta.query.filter(
-                Tarjeta.edad_minima <= edad, 
-                Tarjeta.tipo == tipo,
-                Tarjeta.aprobada == True
-            ).all()
+            resultados = [
+                t for t in catalogo_aprobado()
+                if t.edad_minima <= edad and t.tipo == tipo
+            ]
             
             if resultados:
                 flash(f'¡Encontramos {len(resultados)} tarjeta(s) para ti!', 'success')
@@ -204,14 +411,13 @@ def buscar():
 
 @app.route('/educacion')
 def educacion():
-    return render_template('educacion.html')
+    return render_estatico('educacion.html')
 
 @app.route('/calculadora')
 def calculadora():
-    return render_template('calculadora.html')
+    return render_estatico('calculadora.html')
 
 # ==================== RUTA TEMPORAL PARA RESET ====================
-@app.route('/reset-db')
 def reset_db_route():
     try:
         with app.app_context():
@@ -219,36 +425,20 @@ def reset_db_route():
             db.drop_all()
             db.create_all()
             
-            admin = Usuario(
-                email='admin@policard.com',
-                password=generate_password_hash('AdminPoliCard2025!'),
-                nombre='Administrador PoliCard',
-                tipo='admin'
-            )
-            db.session.add(admin)
+            db.session.execute(insert(Usuario), [{
+                'email': 'admin@policard.com',
+                'password': hash_password('AdminPoliCard2025!'),
+                'nombre': 'Administrador PoliCard',
+                'tipo': 'admin'
+            }])
             db.session.commit()
+            invalidar_catalogo()
             
-        return '''
-        <!DOCTYPE html>
-        <html>
-        <head><script src="https://cdn.tailwindcss.com"></script></head>
-        <body class="bg-gray-100 p-8">
-            <div class="max-w-md mx-auto bg-white rounded-lg shadow-lg p-6 text-center">
-                <div class="text-green-500 text-6xl mb-4">✅</div>
-                <h1 class="text-2xl font-bold text-gray-800 mb-4">Base de Datos Reseteada</h1>
-                <p class="text-gray-600 mb-6">Credenciales: admin@policard.com / AdminPoliCard2025!</p>
-                <a href="/login" class="block w-full bg-green-600 text-white py-3 rounded-lg hover:bg-green-700 transition">
-                    Iniciar Sesión
-                </a>
-            </div>
-        </body>
-        </html>
-        '''
+        return render_template('reset_db.html')
     except Exception as e:
         return f'<h1>❌ Error: {str(e)}</h1>'
 
 # ==================== RUTA TEMPORAL PARA DATOS DE PRUEBA ====================
-@app.route('/create-sample-data')
 def create_sample_data():
     try:
         with app.app_context():
@@ -257,7 +447,7 @@ def create_sample_data():
             if not banco:
                 usuario_banco = Usuario(
                     email='banco@prueba.com',
-                    password=generate_password_hash('banco123'),
+                    password=hash_password('banco123'),
                     nombre='Gerente Banco Prueba',
                     tipo='banco'
                 )
@@ -293,46 +483,29 @@ def create_sample_data():
                 }
             ]
             
-            for tarjeta_data in tarjetas_ejemplo:
-                if not Tarjeta.query.filter_by(nombre=tarjeta_data['nombre']).first():
-                    tarjeta = Tarjeta(
-                        nombre=tarjeta_data['nombre'],
-                        banco_id=banco.id,
-                        tipo=tarjeta_data['tipo'],
-                        cat=tarjeta_data['cat'],
-                        anualidad=tarjeta_data['anualidad'],
-                        edad_minima=tarjeta_data['edad_minima'],
-                        beneficios=tarjeta_data['beneficios'],
-                        aprobada=True
-                    )
-                    db.session.add(tarjeta)
+            # Un solo SELECT ... IN para saber cuáles ya existen
+            existentes = set(db.session.scalars(
+                select(Tarjeta.nombre).where(Tarjeta.nombre.in_([t['nombre'] for t in tarjetas_ejemplo]))
+            ))
+            db.session.add_all([
+                Tarjeta(**tarjeta_data, banco_id=banco.id, aprobada=True)
+                for tarjeta_data in tarjetas_ejemplo
+                if tarjeta_data['nombre'] not in existentes
+            ])
             
             db.session.commit()
+            invalidar_catalogo()
             
-            return '''
-            <!DOCTYPE html>
-            <html>
-            <head><script src="https://cdn.tailwindcss.com"></script></head>
-            <body class="bg-gray-100 p-8">
-                <div class="max-w-md mx-auto bg-white rounded-lg shadow-lg p-6 text-center">
-                    <div class="text-green-500 text-6xl mb-4">✅</div>
-                    <h1 class="text-2xl font-bold text-gray-800 mb-4">Datos de Prueba Creados</h1>
-                    <div class="space-y-3">
-                        <a href="/admin/tarjetas" class="block w-full bg-blue-600 text-white py-3 rounded-lg hover:bg-blue-700 transition">
-                            Ver Tarjetas
-                        </a>
-                        <a href="/tarjetas" class="block w-full bg-green-600 text-white py-3 rounded-lg hover:bg-green-700 transition">
-                            Ver Catálogo
-                        </a>
-                    </div>
-                </div>
-            </body>
-            </html>
-            '''
+            return render_template('sample_data.html')
             
     except Exception as e:
         return f'<h1>❌ Error: {str(e)}</h1>'
 
+# Rutas que borran o siembran la base: solo se montan si se pide explícitamente
+if os.environ.get('ENABLE_RESET') == '1':
+    app.add_url_rule('/reset-db', view_func=reset_db_route)
+    app.add_url_rule('/create-sample-data', view_func=create_sample_data)
+
 # ==================== AUTENTICACIÓN ====================
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -343,10 +516,11 @@ def login():
     if form.validate_on_submit():
         try:
             usuario = Usuario.query.filter_by(email=form.email.data).first()
-            if usuario and check_password_hash(usuario.password, form.password.data):
+            if usuario and verificar_password(usuario, form.password.data):
                 session['user_id'] = usuario.id
                 session['user_type'] = usuario.tipo
                 session['user_name'] = usuario.nombre
+                session['user_active'] = bool(usuario.activo)
                 flash(f'¡Bienvenido {usuario.nombre}!', 'success')
                 return redirect(url_for('dashboard'))
             else:
@@ -361,40 +535,35 @@ def registro_banco():
     form = RegistroBancoForm()
     if form.validate_on_submit():
         try:
-            if Usuario.query.filter_by(email=form.email.data).first():
-                flash('Este email ya está registrado', 'danger')
-                return redirect(url_for('registro_banco'))
-            
             usuario = Usuario(
                 email=form.email.data,
-                password=generate_password_hash(form.password.data),
+                password=hash_password(form.password.data),
                 nombre=form.nombre_contacto.data,
                 tipo='banco'
             )
-            db.session.add(usuario)
-            db.session.flush()
-            
             banco = Banco(
-                usuario_id=usuario.id,
+                usuario=usuario,
                 nombre_banco=form.nombre_banco.data,
                 telefono=form.telefono.data,
                 sitio_web=form.sitio_web.data,
                 descripcion=form.descripcion.data
             )
-            db.session.add(banco)
-            db.session.flush()
-            
             solicitud = Solicitud(
-                banco_id=banco.id,
-                tipo_solicitud='banco',
-                referencia_id=banco.id
+                banco=banco,
+                tipo_solicitud='banco'
             )
-            db.session.add(solicitud)
+            db.session.add_all([usuario, banco, solicitud])
             
             db.session.commit()
+            invalidar_estadisticas_admin()
             flash('Registro exitoso. Pendiente de aprobación.', 'success')
             return redirect(url_for('login'))
         
+        except IntegrityError:
+            # El índice único de email decide, sin SELECT previo ni carrera entre registros
+            db.session.rollback()
+            flash('Este email ya está registrado', 'danger')
+            return redirect(url_for('registro_banco'))
         except Exception as e:
             db.session.rollback()
             flash('Error en el registro', 'danger')
@@ -403,6 +572,8 @@ def registro_banco():
 
 @app.route('/logout')
 def logout():
+    if 'user_id' in session:
+        olvidar_verificaciones(session['user_id'])
     session.clear()
     flash('Sesión cerrada', 'info')
     return redirect(url_for('index'))
@@ -411,24 +582,47 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    usuario = Usuario.query.get(session['user_id'])
-    if usuario.tipo == 'admin':
+    if session.get('user_type') == 'admin':
         return redirect(url_for('admin_dashboard'))
     else:
         return redirect(url_for('banco_dashboard'))
 
 # ==================== PANEL ADMIN ====================
+def sin_lazy_en_debug(*opciones):
+    # En debug un lazy load no previsto en la plantilla falla en vez de generar N+1 silencioso
+    return opciones + (raiseload('*'),) if app.debug else opciones
+
+def obtener_estadisticas_admin():
+    stats = cache.get('admin:stats')
+    if stats is not None:
+        return stats
+    
+    # Una sola sentencia: un agregado condicional por tabla, unidos como filas únicas
+    bancos = select(
+        func.count(Banco.id).label('total_bancos'),
+        func.count(case((Banco.aprobado == False, 1))).label('bancos_pendientes')
+    ).subquery()
+    tarjetas = select(
+        func.count(Tarjeta.id).label('total_tarjetas'),
+        func.count(case((Tarjeta.aprobada == False, 1))).label('tarjetas_pendientes')
+    ).subquery()
+    solicitudes = select(
+        func.count(Solicitud.id).label('solicitudes_pendientes')
+    ).where(Solicitud.estado == 'pendiente').subquery()
+    
+    fila = db.session.execute(
+        select(bancos, tarjetas, solicitudes)
+        .select_from(bancos.join(tarjetas, true()).join(solicitudes, true()))
+    ).one()
+    stats = dict(fila._mapping)
+    cache.set('admin:stats', stats, timeout=30)
+    return stats
+
 @app.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
     try:
-        stats = {
-            'total_bancos': Banco.query.count(),
-            'bancos_pendientes': Banco.query.filter_by(aprobado=False).count(),
-            'total_tarjetas': Tarjeta.query.count(),
-            'tarjetas_pendientes': Tarjeta.query.filter_by(aprobada=False).count(),
-            'solicitudes_pendientes': Solicitud.query.filter_by(estado='pendiente').count()
-        }
+        stats = obtener_estadisticas_admin()
         return render_template('admin/dashboard.html', stats=stats)
     except Exception as e:
         flash('Error al cargar el dashboard', 'danger')
@@ -438,7 +632,11 @@ def admin_dashboard():
 @admin_required
 def admin_solicitudes():
     try:
-        solicitudes = Solicitud.query.filter_by(estado='pendiente').all()
+        solicitudes = Solicitud.query.options(
+            *sin_lazy_en_debug(joinedload(Solicitud.banco).options(
+                joinedload(Banco.usuario), selectinload(Banco.tarjetas)
+            ))
+        ).filter_by(estado='pendiente').order_by(Solicitud.fecha_solicitud.desc()).all()
         return render_template('admin/solicitudes.html', solicitudes=solicitudes)
     except Exception as e:
         return render_template('admin/solicitudes.html', solicitudes=[])
@@ -447,20 +645,34 @@ def admin_solicitudes():
 @admin_required
 def aprobar_solicitud(id):
     try:
-        solicitud = Solicitud.query.get_or_404(id)
-        solicitud.estado = 'aprobada'
-        solicitud.fecha_respuesta = datetime.utcnow()
+        # Un único instante (UTC) para ambos UPDATE: en SQLite cada sentencia evaluaría
+        # CURRENT_TIMESTAMP por separado y los sellos podrían diferir
+        ahora = datetime.now(timezone.utc)
+        # UPDATE ... RETURNING: sin SELECT previo ni hidratar objetos ORM
+        solicitud = db.session.execute(
+            update(Solicitud)
+            .where(Solicitud.id == id)
+            .values(estado='aprobada', fecha_respuesta=ahora)
+            .returning(Solicitud.tipo_solicitud, Solicitud.referencia_id)
+        ).one_or_none()
+        if solicitud is None:
+            abort(404)
         
         if solicitud.tipo_solicitud == 'banco':
-            banco = Banco.query.get(solicitud.referencia_id)
-            if banco:
-                banco.aprobado = True
+            db.session.execute(
+                update(Banco)
+                .where(Banco.id == solicitud.referencia_id)
+                .values(aprobado=True, fecha_aprobacion=ahora)
+            )
         elif solicitud.tipo_solicitud == 'tarjeta':
-            tarjeta = Tarjeta.query.get(solicitud.referencia_id)
-            if tarjeta:
-                tarjeta.aprobada = True
+            db.session.execute(
+                update(Tarjeta)
+                .where(Tarjeta.id == solicitud.referencia_id)
+                .values(aprobada=True, fecha_aprobacion=ahora)
+            )
         
         db.session.commit()
+        invalidar_catalogo()
         flash('Solicitud aprobada', 'success')
     except Exception as e:
         db.session.rollback()
@@ -472,12 +684,20 @@ def aprobar_solicitud(id):
 @admin_required
 def rechazar_solicitud(id):
     try:
-        solicitud = Solicitud.query.get_or_404(id)
-        solicitud.estado = 'rechazada'
-        solicitud.fecha_respuesta = datetime.utcnow()
-        solicitud.comentario_admin = request.form.get('comentario', '')
+        resultado = db.session.execute(
+            update(Solicitud)
+            .where(Solicitud.id == id)
+            .values(
+                estado='rechazada',
+                fecha_respuesta=func.now(),
+                comentario_admin=request.form.get('comentario', '')
+            )
+        )
+        if resultado.rowcount == 0:
+            abort(404)
         
         db.session.commit()
+        invalidar_estadisticas_admin()
         flash('Solicitud rechazada', 'info')
     except Exception as e:
         db.session.rollback()
@@ -489,18 +709,41 @@ def rechazar_solicitud(id):
 @admin_required
 def admin_bancos():
     try:
-        bancos = Banco.query.all()
+        # Solo las columnas que muestra la plantilla (sin logo_url); de las tarjetas basta el estado
+        bancos = db.session.execute(
+            select(Banco).options(
+                load_only(Banco.id, Banco.usuario_id, Banco.nombre_banco, Banco.telefono, Banco.sitio_web,
+                          Banco.descripcion, Banco.aprobado, Banco.fecha_aprobacion),
+                selectinload(Banco.tarjetas).load_only(Tarjeta.id, Tarjeta.aprobada),
+                joinedload(Banco.usuario).load_only(Usuario.nombre, Usuario.email, Usuario.activo)
+            )
+        ).scalars().all()
         return render_template('admin/bancos.html', bancos=bancos)
     except Exception as e:
         flash('Error al cargar los bancos', 'danger')
         return render_template('admin/bancos.html', bancos=[])
 
+TARJETAS_POR_PAGINA = 50
+
 @app.route('/admin/tarjetas')
 @admin_required
 def admin_tarjetas():
     try:
-        tarjetas = Tarjeta.query.all()
-        return render_template('admin/tarjetas.html', tarjetas=tarjetas)
+        # Paginación por llave (id DESC sobre la PK): sin OFFSET ni COUNT(*)
+        consulta = Tarjeta.query.options(*sin_lazy_en_debug(
+            load_only(Tarjeta.id, Tarjeta.nombre, Tarjeta.tipo, Tarjeta.cat, Tarjeta.anualidad,
+                      Tarjeta.edad_minima, Tarjeta.beneficios, Tarjeta.aprobada, Tarjeta.fecha_creacion),
+            joinedload(Tarjeta.banco_rel).load_only(Banco.nombre_banco)
+        ))
+        after_id = request.args.get('after_id', type=int)
+        if after_id is not None:
+            consulta = consulta.filter(Tarjeta.id < after_id)
+        tarjetas = consulta.order_by(Tarjeta.id.desc()).limit(TARJETAS_POR_PAGINA + 1).all()
+        siguiente = None
+        if len(tarjetas) > TARJETAS_POR_PAGINA:
+            tarjetas = tarjetas[:TARJETAS_POR_PAGINA]
+            siguiente = tarjetas[-1].id
+        return render_template('admin/tarjetas.html', tarjetas=tarjetas, siguiente=siguiente)
     except Exception as e:
         return render_template('admin/tarjetas.html', tarjetas=[])
 
@@ -509,17 +752,24 @@ def admin_tarjetas():
 @banco_required
 def banco_dashboard():
     try:
-        usuario = Usuario.query.get(session['user_id'])
+        usuario = current_user()
         banco = usuario.banco
         
-        stats = {
-            'tarjetas_count': len(banco.tarjetas),
-            'tarjetas_aprobadas': sum(1 for t in banco.tarjetas if t.aprobada),
-            'solicitudes_pendientes': Solicitud.query.filter_by(banco_id=banco.id, estado='pendiente').count(),
-            'banco_aprobado': banco.aprobado
-        }
+        # Conteos en la base, sin materializar las tarjetas del banco
+        solicitudes_pendientes = select(func.count(Solicitud.id)).where(
+            Solicitud.banco_id == banco.id, Solicitud.estado == 'pendiente'
+        ).scalar_subquery()
+        fila = db.session.execute(
+            select(
+                func.count(Tarjeta.id).label('tarjetas_count'),
+                func.count(case((Tarjeta.aprobada == True, 1))).label('tarjetas_aprobadas'),
+                solicitudes_pendientes.label('solicitudes_pendientes')
+            ).where(Tarjeta.banco_id == banco.id)
+        ).one()
+        
+        stats = dict(fila._mapping, banco_aprobado=banco.aprobado)
         
-        return render_template('banco/dashboard.html', banco=banco, stats=stats)
+        return render_template('banco/bancodashboard.html', banco=banco, stats=stats)
     except Exception as e:
         flash('Error al cargar el dashboard', 'danger')
         return redirect(url_for('index'))
@@ -528,7 +778,7 @@ def banco_dashboard():
 @banco_required
 def banco_tarjetas():
     try:
-        usuario = Usuario.query.get(session['user_id'])
+        usuario = current_user()
         banco = usuario.banco
         tarjetas = banco.tarjetas
         return render_template('banco/tarjetas.html', tarjetas=tarjetas, banco=banco)
@@ -540,7 +790,7 @@ def banco_tarjetas():
 @banco_required
 def banco_nueva_tarjeta():
     try:
-        usuario = Usuario.query.get(session['user_id'])
+        usuario = current_user()
         banco = usuario.banco
         
         if not banco.aprobado:
@@ -559,16 +809,14 @@ def banco_nueva_tarjeta():
                 beneficios=form.beneficios.data,
                 imagen_url=form.imagen_url.data
             )
-            db.session.add(tarjeta)
-            db.session.flush()
-            
             solicitud = Solicitud(
                 banco_id=banco.id,
                 tipo_solicitud='tarjeta',
-                referencia_id=tarjeta.id
+                tarjeta=tarjeta
             )
-            db.session.add(solicitud)
+            db.session.add_all([tarjeta, solicitud])
             db.session.commit()
+            invalidar_estadisticas_admin()
             
             flash('Tarjeta creada. Pendiente de aprobación.', 'success')
             return redirect(url_for('banco_tarjetas'))
@@ -584,9 +832,11 @@ def banco_nueva_tarjeta():
 @banco_required
 def banco_editar_tarjeta(id):
     try:
-        usuario = Usuario.query.get(session['user_id'])
+        usuario = current_user()
         banco = usuario.banco
-        tarjeta = Tarjeta.query.filter_by(id=id, banco_id=banco.id).first_or_404()
+        tarjeta = db.session.get(Tarjeta, id)
+        if tarjeta is None or tarjeta.banco_id != banco.id:
+            abort(404)
         
         form = TarjetaForm(obj=tarjeta)
         if form.validate_on_submit():
@@ -606,6 +856,7 @@ def banco_editar_tarjeta(id):
             )
             db.session.add(solicitud)
             db.session.commit()
+            invalidar_catalogo()
             
             flash('Tarjeta actualizada. Pendiente de aprobación.', 'success')
             return redirect(url_for('banco_tarjetas'))
@@ -621,12 +872,15 @@ def banco_editar_tarjeta(id):
 @banco_required
 def banco_eliminar_tarjeta(id):
     try:
-        usuario = Usuario.query.get(session['user_id'])
+        usuario = current_user()
         banco = usuario.banco
-        tarjeta = Tarjeta.query.filter_by(id=id, banco_id=banco.id).first_or_404()
+        tarjeta = db.session.get(Tarjeta, id)
+        if tarjeta is None or tarjeta.banco_id != banco.id:
+            abort(404)
         
         db.session.delete(tarjeta)
         db.session.commit()
+        invalidar_catalogo()
         flash('Tarjeta eliminada exitosamente', 'success')
     except Exception as e:
         db.session.rollback()
@@ -649,7 +903,7 @@ def create_sample_data_on_startup():
     with app.app_context():
         try:
             # Verificar si ya existen datos
-            if Tarjeta.query.count() > 0:
+            if existe(Tarjeta.query):
                 print("✅ Ya existen datos en la base de datos")
                 return
             
@@ -667,7 +921,7 @@ def create_sample_data_on_startup():
             # Crear usuario para el banco
             usuario_banco = Usuario(
                 email='bbva@ejemplo.com',
-                password=generate_password_hash('bbva123'),
+                password=hash_password('bbva123'),
                 nombre='Juan Pérez - BBVA',
                 tipo='banco'
             )
@@ -742,6 +996,7 @@ def create_sample_data_on_startup():
                 db.session.add(tarjeta)
             
             db.session.commit()
+            invalidar_catalogo()
             print("✅ Datos de prueba creados exitosamente")
             print("📊 Tarjetas creadas: 5")
             print("🏦 Banco creado: BBVA México")
@@ -753,23 +1008,58 @@ def create_sample_data_on_startup():
 def init_db():
     with app.app_context():
         try:
-            db.create_all()
-            if not Usuario.query.filter_by(email='admin@policard.com').first():
-                admin = Usuario(
-                    email='admin@policard.com',
-                    password=generate_password_hash('AdminPoliCard2025!'),
-                    nombre='Administrador',
-                    tipo='admin'
-                )
-                db.session.add(admin)
+            if db.engine.dialect.name == 'postgresql':
+                # Varias instancias arrancando a la vez: solo una ejecuta el DDL,
+                # el lock se libera al cerrar la transacción
+                with db.engine.begin() as conn:
+                    conn.execute(text('SELECT pg_advisory_xact_lock(42)'))
+                    db.metadata.create_all(conn)
+            else:
+                db.create_all()
+            print("✅ Tablas verificadas")
+        except Exception as e:
+            print(f"❌ Error inicializando BD: {e}")
+
+def init_admin():
+    with app.app_context():
+        try:
+            if not existe(Usuario.query.filter_by(email='admin@policard.com')):
+                db.session.execute(insert(Usuario), [{
+                    'email': 'admin@policard.com',
+                    'password': hash_password('AdminPoliCard2025!'),
+                    'nombre': 'Administrador',
+                    'tipo': 'admin'
+                }])
                 db.session.commit()
                 print("✅ Base de datos inicializada")
         except Exception as e:
-            print(f"❌ Error inicializando BD: {e}")
+            print(f"❌ Error creando administrador: {e}")
+
+def precompilar_plantillas():
+    # Llena el bytecode cache para que el primer request de cada worker no compile
+    for nombre in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nombre)
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Crea las tablas, los datos de prueba y precompila las plantillas."""
+    init_db()
+    create_sample_data_on_startup()
+    precompilar_plantillas()
+
+@app.cli.command('init-admin')
+def init_admin_command():
+    """Crea el usuario administrador si no existe."""
+    init_admin()
+
+# Los workers no inicializan la BD al importar: se hace una vez con
+# `flask --app app init-db` y `flask --app app init-admin`, o con POLICARD_INIT_DB=1
+if __name__ == '__main__' or os.environ.get('POLICARD_INIT_DB') == '1':
+    init_db()
+    init_admin()
+    create_sample_data_on_startup()
 
-# Inicializar base de datos y crear datos
-init_db()
-create_sample_data_on_startup()# ==================== EJECUCIÓN ====================
+# ==================== EJECUCIÓN ====================
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -1,20 +1,47 @@
-from app import app, db, Tarjeta
+from sqlalchemy import insert, select
+
+from app import app, db, hash_password, Usuario, Banco, Tarjeta
 
 with app.app_context():
     db.drop_all()
     db.create_all()
     
     tarjetas = [
-        Tarjeta(nombre='BBVA Azul', banco='BBVA', tipo='estudiante', cat=45.5, anualidad=0, edad_minima=18, beneficios='Sin anualidad, cashback'),
-        Tarjeta(nombre='Santander Like U', banco='Santander', tipo='joven', cat=42.0, anualidad=500, edad_minima=18, beneficios='Descuentos en entretenimiento'),
-        Tarjeta(nombre='Banamex Tec', banco='Banamex', tipo='estudiante', cat=38.5, anualidad=0, edad_minima=18, beneficios='Sin anualidad, seguro'),
-        Tarjeta(nombre='HSBC Zero', banco='HSBC', tipo='joven', cat=50.0, anualidad=0, edad_minima=21, beneficios='Meses sin intereses'),
-        Tarjeta(nombre='Banorte Clásica', banco='Banorte', tipo='clasica', cat=55.0, anualidad=800, edad_minima=22, beneficios='Puntos recompensa'),
-        Tarjeta(nombre='Nu Ultravioleta', banco='Nu', tipo='estudiante', cat=35.0, anualidad=0, edad_minima=18, beneficios='Cashback automático'),
+        dict(nombre='BBVA Azul', banco='BBVA', tipo='estudiante', cat=45.5, anualidad=0, edad_minima=18, beneficios='Sin anualidad, cashback'),
+        dict(nombre='Santander Like U', banco='Santander', tipo='joven', cat=42.0, anualidad=500, edad_minima=18, beneficios='Descuentos en entretenimiento'),
+        dict(nombre='Banamex Tec', banco='Banamex', tipo='estudiante', cat=38.5, anualidad=0, edad_minima=18, beneficios='Sin anualidad, seguro'),
+        dict(nombre='HSBC Zero', banco='HSBC', tipo='joven', cat=50.0, anualidad=0, edad_minima=21, beneficios='Meses sin intereses'),
+        dict(nombre='Banorte Clásica', banco='Banorte', tipo='clasica', cat=55.0, anualidad=800, edad_minima=22, beneficios='Puntos recompensa'),
+        dict(nombre='Nu Ultravioleta', banco='Nu', tipo='estudiante', cat=35.0, anualidad=0, edad_minima=18, beneficios='Cashback automático'),
+    ]
+    
+    # Tarjeta solo conoce banco_id: los IDs se resuelven con una sola consulta por nombre
+    nombres = {t['banco'] for t in tarjetas}
+    bancos = dict(db.session.execute(
+        select(Banco.nombre_banco, Banco.id).where(Banco.nombre_banco.in_(nombres))
+    ).all())
+    
+    # Cada banco necesita su usuario; los que faltan se crean juntos
+    nuevos = [
+        Banco(
+            nombre_banco=nombre,
+            usuario=Usuario(
+                email=f'{nombre.lower()}@ejemplo.com',
+                password=hash_password(f'{nombre.lower()}123'),
+                nombre=f'Contacto {nombre}',
+                tipo='banco'
+            )
+        )
+        for nombre in sorted(nombres - bancos.keys())
     ]
+    db.session.add_all(nuevos)
+    db.session.flush()
+    bancos.update((banco.nombre_banco, banco.id) for banco in nuevos)
     
-    for tarjeta in tarjetas:
-        db.session.add(tarjeta)
+    # Un solo INSERT multi-VALUES en lugar de un add() por tarjeta
+    for t in tarjetas:
+        t['banco_id'] = bancos[t.pop('banco')]
+    db.session.execute(insert(Tarjeta), tarjetas)
     
     db.session.commit()
-    print("Base de datos creada exitosamente")
\ No newline at end of file
+    print("Base de datos creada exitosamente")
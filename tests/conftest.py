@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py lee la configuración al importarse: el entorno tiene que estar listo antes
+_TMP = tempfile.mkdtemp(prefix='policard-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_TMP, 'test.db')
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['JINJA_CACHE_DIR'] = _TMP
+# Modo debug desde el import: Tarjeta.banco_rel queda en lazy='raise' y las vistas agregan raiseload('*')
+os.environ['FLASK_DEBUG'] = '1'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as policard  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    policard.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    assert policard.app.debug
+    policard.init_db()
+    policard.init_admin()
+    policard.create_sample_data_on_startup()
+
+    # Una solicitud de banco pendiente para que /admin/solicitudes tenga filas que renderizar
+    client = policard.app.test_client()
+    response = client.post('/registro-banco', data={
+        'email': 'pendiente@ejemplo.com',
+        'password': 'pendiente123',
+        'confirm_password': 'pendiente123',
+        'nombre_contacto': 'Contacto Pendiente',
+        'nombre_banco': 'Banco Pendiente',
+        'telefono': '55 0000 0000',
+        'sitio_web': '',
+        'descripcion': 'Banco en revisión',
+    })
+    assert response.status_code == 302 and response.location.endswith('/login')
+
+    # Y una de tarjeta: la plantilla de solicitudes recorre banco.tarjetas para mostrarla
+    client = _login(policard.app, 'bbva@ejemplo.com', 'bbva123')
+    response = client.post('/banco/tarjeta/nueva', data={
+        'nombre': 'BBVA Tarjeta Pendiente',
+        'tipo': 'joven',
+        'cat': 30.0,
+        'anualidad': 100,
+        'edad_minima': 18,
+        'beneficios': 'En revisión',
+        'imagen_url': '',
+    })
+    assert response.status_code == 302 and response.location.endswith('/banco/tarjetas')
+    return policard.app
+
+
+def _login(app, email, password):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': password})
+    assert response.status_code == 302 and response.location.endswith('/dashboard')
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    return _login(app, 'admin@policard.com', 'AdminPoliCard2025!')
+
+
+@pytest.fixture
+def banco_client(app):
+    return _login(app, 'bbva@ejemplo.com', 'bbva123')
@@ -0,0 +1,26 @@
+import app as policard
+
+
+def _pendientes():
+    with policard.app.app_context():
+        return policard.obtener_estadisticas_admin()['solicitudes_pendientes']
+
+
+def test_registro_invalida_estadisticas_admin(app, admin_client):
+    assert admin_client.get('/admin/dashboard').status_code == 200
+    antes = _pendientes()
+
+    response = app.test_client().post('/registro-banco', data={
+        'email': 'nuevo@ejemplo.com',
+        'password': 'nuevo1234',
+        'confirm_password': 'nuevo1234',
+        'nombre_contacto': 'Contacto Nuevo',
+        'nombre_banco': 'Banco Nuevo',
+        'telefono': '55 1111 1111',
+        'sitio_web': '',
+        'descripcion': '',
+    })
+    assert response.status_code == 302
+
+    # Sin invalidación el panel seguiría mostrando el conteo cacheado hasta 30s
+    assert _pendientes() == antes + 1
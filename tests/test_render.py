@@ -0,0 +1,66 @@
+"""Renderiza cada listado en modo debug (raiseload('*') activo).
+
+Un acceso lazy no previsto, una variable indefinida o una plantilla inexistente
+hacen que la vista caiga en su except: aquí eso se ve como un status distinto
+de 200, un mensaje "Error al ..." o una página sin los datos esperados.
+"""
+import re
+
+import app as policard
+
+TARJETAS_EJEMPLO = ['BBVA Oro Joven', 'BBVA Platino Clásica', 'Santander Like U', 'Banamex Clásica']
+
+
+def _get_ok(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, url
+    html = response.get_data(as_text=True)
+    assert 'Error al' not in html, url
+    return html
+
+
+def test_tarjetas_publico(app):
+    html = _get_ok(app.test_client(), '/tarjetas')
+    for nombre in TARJETAS_EJEMPLO:
+        assert nombre in html
+
+
+def test_admin_solicitudes(admin_client):
+    html = _get_ok(admin_client, '/admin/solicitudes')
+    assert 'Banco Pendiente' in html
+    assert 'BBVA Tarjeta Pendiente' in html
+
+
+def test_admin_bancos(admin_client):
+    html = _get_ok(admin_client, '/admin/bancos')
+    assert 'BBVA México' in html
+    assert 'Banco Pendiente' in html
+
+
+def test_admin_tarjetas(admin_client):
+    html = _get_ok(admin_client, '/admin/tarjetas')
+    for nombre in TARJETAS_EJEMPLO:
+        assert nombre in html
+
+
+def test_admin_tarjetas_paginas(admin_client, monkeypatch):
+    monkeypatch.setattr(policard, 'TARJETAS_POR_PAGINA', 2)
+    url, vistas = '/admin/tarjetas', 0
+    while url:
+        html = _get_ok(admin_client, url)
+        vistas += html.count('Creada:')
+        siguiente = re.search(r'after_id=(\d+)', html)
+        url = f'/admin/tarjetas?after_id={siguiente.group(1)}' if siguiente else None
+    with policard.app.app_context():
+        assert vistas == policard.Tarjeta.query.count()
+
+
+def test_banco_dashboard(banco_client):
+    html = _get_ok(banco_client, '/banco/dashboard')
+    assert 'BBVA México' in html
+
+
+def test_banco_tarjetas(banco_client):
+    html = _get_ok(banco_client, '/banco/tarjetas')
+    for nombre in TARJETAS_EJEMPLO:
+        assert nombre in html